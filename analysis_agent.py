@@ -1,13 +1,19 @@
 """Orchestrates multimodal reasoning with OpenAI guided by heuristics and rubric."""
 import json
+import os
 import re
+import uuid
 from pathlib import Path
-from typing import List, Dict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
 import base64
+from io import BytesIO
 
 from openai import OpenAI
+from PIL import Image
 
-from heuristics import aggregate_heuristics
+from heuristics import aggregate_heuristics, dedupe_frames
+from helpers import with_retry
 from rubric import (
     AI_SLOP_SIGNALS,
     BRAIN_ROT_SIGNALS,
@@ -15,128 +21,124 @@ from rubric import (
     TWENTY_FIRST_CENTURY,
 )
 
+# Image budget for vision calls: longest frame edge in pixels, sent with detail="low".
+MAX_FRAME_EDGE = 512
+FRAME_JPEG_QUALITY = 80
 
-def chunk_transcript(transcript: str, chunk_words: int = 180) -> List[str]:
-    words = transcript.split()
-    if not words:
-        return []
-    return [" ".join(words[i : i + chunk_words]) for i in range(0, len(words), chunk_words)]
+# "base64" inlines frames in the request; "s3" uploads them and passes presigned URLs.
+_FRAME_UPLOAD_MODE = os.environ.get("FRAME_UPLOAD_MODE", "base64")
+FRAME_URL_EXPIRES_IN = 3600
+# Key prefix for uploaded frames; the bucket's lifecycle rule should expire it.
+FRAME_UPLOAD_PREFIX = "kids-video-eval"
 
+# Number of trailing transcript chunks previewed in the prompt (after the first chunk).
+ROLLING_SUMMARY_CHUNKS = 4
 
-def build_chunk_notes(chunks: List[str]) -> List[str]:
+_JSON_RE = re.compile(r"\{.*\}", re.S)
+
+
+def chunk_transcript(transcript: str, chunk_words: int = 180) -> Iterator[str]:
+    words = iter(transcript.split())
+    while True:
+        batch = list(islice(words, chunk_words))
+        if not batch:
+            return
+        yield " ".join(batch)
+
+
+def build_chunk_notes(chunks: Iterable[str], start: int = 1) -> List[str]:
     notes = []
-    for idx, chunk in enumerate(chunks, start=1):
+    for idx, chunk in enumerate(chunks, start=start):
         preview = chunk[:200].replace("\n", " ")
         notes.append(f"Chunk {idx} (~{len(chunk.split())} words): {preview}")
     return notes
 
 
 def extract_json(content: str) -> Dict:
-    match = re.search(r"\{.*\}", content, re.S)
+    match = _JSON_RE.search(content)
     if not match:
         raise ValueError("Unable to find JSON in assistant response")
     return json.loads(match.group(0))
 
 
 
+def _downscaled_jpeg(image_path: Path) -> BytesIO:
+    """
+    Downscale a frame to MAX_FRAME_EDGE and re-encode it as an in-memory JPEG;
+    the visual checks (colors, clarity, clutter) don't need full resolution.
+    """
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        img.thumbnail((MAX_FRAME_EDGE, MAX_FRAME_EDGE), Image.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=FRAME_JPEG_QUALITY)
+    buffer.seek(0)
+    return buffer
+
+
 def encode_image_base64(image_path: Path) -> str:
     """
     Encode an image file as base64 for OpenAI vision models.
     """
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+    return base64.b64encode(_downscaled_jpeg(image_path).getbuffer()).decode("ascii")
 
 
 
-def describe_video_frames(
-    frame_paths: List[Path],
-    client: OpenAI,
-    model: str = "gpt-4o-mini",
-) -> List[Dict]:
+def encode_frames(frame_paths: List[Path]) -> List[str]:
     """
-    Uses a GPT vision-capable model to describe visual characteristics
-    of sampled video frames relevant to educational quality for kids.
-
-    Returns a list of dicts, one per frame, containing:
-      - frame_path
-      - visual_description
-      - educational_relevance_notes
-      - uncertainty_notes
+    Downscale and base64-encode sampled frames, in order, for the analysis call.
     """
+    return [encode_image_base64(frame_path) for frame_path in frame_paths]
 
-    results: List[Dict] = []
-
-    system_prompt = (
-        "You are assisting an automated reviewer of children's educational videos. "
-        "Describe visuals cautiously. Avoid certainty. Focus on colors, visual clarity, "
-        "stimulus level, readability, child-friendliness, and educational affordances. "
-        "If unsure, explicitly state uncertainty."
-    )
-    print(f"Describing {len(frame_paths)} video frames using {model}...")
-    for frame_path in frame_paths:
-        image_b64 = encode_image_base64(frame_path)
-
-        user_prompt = [
-            {
-                "type": "input_text",
-                "text": ('''You assess the video frame image give to you for its suitability as children's educational content.'''
-                ),
-            },
-            {
-                "type": "input_image",
-                "image_base64": image_b64,
-            },
-        ]
 
-   
-        response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": (
-                                           '''Describe only what is clearly visible in this frame that may affect its educational value for children.
-Note dominant colors, visual clarity vs clutter, presence of readable text or symbols, apparent age suitability, and any obvious learning cues.
-Avoid assumptions about intent or story. If uncertain, say so briefly. Respond in short concise bullet-like sentences.
-'''
-                        ),
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_b64}"
-                        },
-                    },
-                ],
-            },
-        ],
-        temperature=0.3,
-    )
+def _upload_frames_s3(frame_paths: List[Path]) -> List[str]:
+    """
+    Upload downscaled frames to FRAME_UPLOAD_BUCKET and return presigned GET URLs,
+    so the request references the images instead of inlining base64.
 
+    Uploaded frames are not deleted here (the Streamlit app reuses the URLs
+    across reruns); the bucket needs a lifecycle rule expiring objects under
+    FRAME_UPLOAD_PREFIX, e.g. after one day.
+    """
+    import boto3  # optional; only needed for FRAME_UPLOAD_MODE=s3
 
-        description_text = response.choices[0].message.content
+    bucket = os.environ.get("FRAME_UPLOAD_BUCKET")
+    if not bucket:
+        raise ValueError("FRAME_UPLOAD_MODE=s3 requires FRAME_UPLOAD_BUCKET to be set")
 
-        results.append(
-            {
-                "frame_path": str(frame_path),
-                "visual_description": description_text.strip(),
-                # "uncertainty_notes": (
-                #     "Single-frame analysis; motion, narration, and context not visible."
-                # ),
-            }
+    s3 = boto3.client("s3")
+    prefix = f"{FRAME_UPLOAD_PREFIX}/{uuid.uuid4().hex}"
+    urls = []
+    for frame_path in frame_paths:
+        key = f"{prefix}/{frame_path.name}"
+        s3.upload_fileobj(
+            _downscaled_jpeg(frame_path),
+            bucket,
+            key,
+            ExtraArgs={"ContentType": "image/jpeg"},
+        )
+        urls.append(
+            s3.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": bucket, "Key": key},
+                ExpiresIn=FRAME_URL_EXPIRES_IN,
+            )
         )
-        print(f'"frame_path": {str(frame_path)},"visual_description": {description_text.strip()}')
-        
-    
+    return urls
 
-    return results
+
+def frame_image_urls(frame_paths: List[Path]) -> List[str]:
+    """
+    Image URLs for the sampled frames, in order, after dropping near-duplicate
+    frames: inline base64 data URLs by default, or presigned S3 URLs when
+    FRAME_UPLOAD_MODE=s3.
+    """
+    frame_paths = dedupe_frames(frame_paths)
+    if _FRAME_UPLOAD_MODE == "s3":
+        return _upload_frames_s3(frame_paths)
+    if _FRAME_UPLOAD_MODE != "base64":
+        raise ValueError(f"Unsupported FRAME_UPLOAD_MODE: {_FRAME_UPLOAD_MODE}")
+    return [f"data:image/jpeg;base64,{image_b64}" for image_b64 in encode_frames(frame_paths)]
 
 
 # def run_analysis(
@@ -200,40 +202,32 @@ def run_analysis(
     language_hint: str,
     frame_paths: List[Path],
     client: OpenAI,
+    frame_urls: Optional[List[str]] = None,
 ) -> Dict:
 
     # 1. Deterministic heuristics (unchanged)
     heuristics = aggregate_heuristics(transcript, duration, frame_paths)
 
-    # 2. Transcript chunking (unchanged)
-    chunks = chunk_transcript(transcript)
-    chunk_notes = build_chunk_notes(chunks)
-    rolling_summary = "\n".join(chunk_notes[-4:]) if chunk_notes else "No transcript available"
-
-    # 3. Vision-based frame descriptions
-    frame_descriptions = describe_video_frames(
-        frame_paths=frame_paths,
-        client=client,
-    )
-
-    # Convert frame descriptions into prompt-friendly text
-    visual_notes = []
-    for idx, frame in enumerate(frame_descriptions, start=1):
-        visual_notes.append(
-            f"Frame {idx}: {frame.get('visual_description', '').strip()}\n"
-            # f"Uncertainty: {frame.get('uncertainty_notes', '')}"
-        )
-
-    visual_summary = (
-        "\n".join(visual_notes)
-        if visual_notes
-        else "No visual descriptions available."
-    )
+    # 2. Transcript chunking: only the rolling tail of chunks goes into the prompt
+    chunks = list(chunk_transcript(transcript))
+    tail_start = max(len(chunks) - ROLLING_SUMMARY_CHUNKS, 0)
+    chunk_notes = build_chunk_notes(chunks[tail_start:], start=tail_start + 1)
+    if tail_start > 0:
+        # Keep the opening of the video too, and say what was left out.
+        chunk_notes = build_chunk_notes(chunks[:1]) + (
+            [f"(chunks 2-{tail_start} omitted)"] if tail_start > 1 else []
+        ) + chunk_notes
+    rolling_summary = "\n".join(chunk_notes) if chunk_notes else "No transcript available"
+
+    # 3. Frames go straight to the multimodal model (callers may prepare
+    #    them concurrently with transcription)
+    if frame_urls is None:
+        frame_urls = frame_image_urls(frame_paths)
 
     # 4. Behavioral instructions
     instructions = """
 You are a careful reviewer of children's educational content.
-Use transcript fragments, visual frame descriptions, and heuristics together.
+Use transcript fragments, the attached video frames, and heuristics together.
 This is an advisory tool for parents—avoid claiming certainty or diagnostics.
 Mention uncertainty explicitly, especially where single-frame visuals may mislead.
 Base judgments strictly on the provided rubric signals.
@@ -247,19 +241,15 @@ Respond ONLY with JSON matching the requested schema without extra text or markd
         f"Heuristics: {json.dumps(heuristics)}",
         f"Frames sampled: {len(frame_paths)} (visual variance {heuristics['visual_variance']})",
         "",
-        "Rolling transcript summary:",
+        f"Transcript sample ({len(chunks)} chunks in total; 200-character previews, omitted chunks marked):",
         rolling_summary,
-        "",
-        "Transcript chunks:",
     ]
 
-    content_lines.extend(chunk_notes)
-
     content_lines.extend(
         [
             "",
-            "Visual frame descriptions (single-frame, limited context):",
-            visual_summary,
+            f"Video frames: {len(frame_urls)} sampled frames are attached as images, in playback order "
+            "(single frames, limited context).",
             "",
             f"Brain rot signals: {BRAIN_ROT_SIGNALS}",
             f"Learning value signals: {LEARNING_VALUE_SIGNALS}",
@@ -274,22 +264,33 @@ Respond ONLY with JSON matching the requested schema without extra text or markd
     content = "\n".join(content_lines)
 
     # 6. LLM call
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": "You evaluate kids' educational videos for cautious parents.",
-            },
-            {
-                "role": "user",
-                "content": content,
-            },
-        ],
-        temperature=0.3,
+    messages = [
+        {
+            "role": "system",
+            "content": "You evaluate kids' educational videos for cautious parents.",
+        },
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": content}]
+            + [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": frame_url,
+                        "detail": "low",
+                    },
+                }
+                for frame_url in frame_urls
+            ],
+        },
+    ]
+    response = with_retry(
+        lambda: client.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            temperature=0.3,
+        )
     )
 
     reply = response.choices[0].message.content
     return extract_json(reply)
-    
-
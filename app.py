@@ -4,13 +4,14 @@ import json
 import os
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Tuple
 
 from openai import OpenAI
 
-from analysis_agent import run_analysis
-from video_utils import download_youtube, extract_audio, sample_frames, get_video_duration
+from analysis_agent import frame_image_urls, run_analysis
+from video_utils import download_youtube, extract_audio_and_frames, get_video_duration
 from helpers import transcribe_audio, prepare_workspace, analysis_to_table
 
 
@@ -46,7 +47,8 @@ def main() -> None:
         sys.exit(1)
 
     workspace = prepare_workspace()
-    client = OpenAI(api_key=api_key)
+    # Retries are handled by helpers.with_retry.
+    client = OpenAI(api_key=api_key, max_retries=0)
 
     if args.youtube:
         video_path = download_youtube(args.youtube, workspace)
@@ -59,24 +61,33 @@ def main() -> None:
 
     duration = get_video_duration(video_path)
     audio_path = workspace / "audio.wav"
-    extract_audio(video_path, audio_path)
-    print(f"Extracted audio to {audio_path}")
-    print('Transcribing audio...')
-    transcript, language = transcribe_audio(client, audio_path)
-    print(f"Transcription complete (language: {language})\n Text: {transcript}")
-
     frames_dir = workspace / "frames"
-    print('Sampling frames...')
-    frame_paths = sample_frames(video_path, frames_dir, max_frames=args.frames)
+    print('Extracting audio and sampling frames...')
+    frame_paths = extract_audio_and_frames(
+        video_path, audio_path, frames_dir, max_frames=args.frames, duration=duration
+    )
+    print(f"Extracted audio to {audio_path}")
     print(f"Sampled {len(frame_paths)} frames to {frames_dir}")
 
+    # Prepare frame images while the transcription request is in flight.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        print('Transcribing audio...')
+        transcribe_future = executor.submit(transcribe_audio, client, audio_path)
+        frames_future = executor.submit(frame_image_urls, frame_paths)
+
+        transcript, language = transcribe_future.result()
+        print(f"Transcription complete (language: {language})\n Text: {transcript}")
+
     try:
+        frame_urls = frames_future.result()
+        print(f"Attaching {len(frame_urls)} of {len(frame_paths)} frames after deduplication")
         analysis = run_analysis(
             transcript=transcript,
             duration=duration,
             language_hint=language,
             frame_paths=frame_paths,
             client=client,
+            frame_urls=frame_urls,
         )
     except Exception as exc:
         print(f"analysis failed: {exc}")
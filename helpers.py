@@ -1,20 +1,63 @@
+import hashlib
+import random
 import tempfile
+import time
 from pathlib import Path
-from typing import Tuple
-from openai import OpenAI
+from typing import Callable, Tuple, TypeVar
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 import pandas as pd
 
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def with_retry(fn: Callable[[], T], *, attempts: int = 3, base: float = 1.0) -> T:
+    """Call fn, retrying transient OpenAI failures with exponential backoff and jitter.
+
+    Build the client with max_retries=0 so the SDK's own retries don't stack on these.
+    """
+    if attempts < 1:
+        raise ValueError("attempts must be at least 1")
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except RETRYABLE_ERRORS:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(base * 2 ** attempt + random.random() * 0.5)
+
+
 def transcribe_audio(client: OpenAI, audio_path: Path) -> Tuple[str, str]:
-    with open(audio_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="gpt-4o-transcribe",
-            file=audio_file,
-        )
+    def _transcribe():
+        # Reopen per attempt so a retry uploads the file from the start.
+        with open(audio_path, "rb") as audio_file:
+            return client.audio.transcriptions.create(
+                model="gpt-4o-transcribe",
+                file=audio_file,
+            )
+
+    transcription = with_retry(_transcribe)
     text = getattr(transcription, "text", "")
     language = getattr(transcription, "language", "")
     return text, language
 
 
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents, read in chunks; used as a cache key."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def prepare_workspace() -> Path:
     workdir = Path(tempfile.mkdtemp(prefix="kids-video-eval-"))
     workdir.mkdir(parents=True, exist_ok=True)
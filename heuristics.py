@@ -1,17 +1,35 @@
 """Lightweight, non-LLM heuristic helpers."""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 from PIL import Image
 
-def word_repetition_ratio(text: str) -> float:
-    words = re.findall(r"\b\w+\b", text.lower())
+try:
+    import cv2
+except ImportError:  # optional: faster decode when opencv is installed
+    cv2 = None
+
+_WORD_RE = re.compile(r"\b\w+\b")
+
+
+def tokenize_words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _repetition(words: List[str]) -> float:
     if not words:
         return 0.0
     unique = len(set(words))
     return max(0.0, 1 - unique / len(words))
 
 
+def word_repetition_ratio(text: str) -> float:
+    return _repetition(tokenize_words(text))
+
+
 def speaking_speed(word_count: int, duration: float) -> float:
     if duration <= 0:
         return 0.0
@@ -24,35 +42,82 @@ def transcript_density(word_count: int, duration: float) -> float:
     return word_count / duration
 
 
+def _load_reduced_gray(path: Path) -> Optional[np.ndarray]:
+    """Grayscale frame decoded at 1/8 scale, or None if it can't be read.
+
+    Both paths let libjpeg use DCT scaling instead of decoding every pixel;
+    the luminance and hash heuristics don't need full resolution.
+    """
+    try:
+        if cv2 is not None:
+            img = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        else:
+            with Image.open(path) as pil_img:
+                pil_img.draft("L", (max(1, pil_img.width // 8), max(1, pil_img.height // 8)))
+                img = np.asarray(pil_img.convert("L"), dtype=np.uint8)
+    except Exception:
+        return None
+    if img is None or not img.size:
+        return None
+    return img
+
+
+def _mean_luminance(path: Path) -> Optional[float]:
+    img = _load_reduced_gray(path)
+    if img is None:
+        return None
+    return float(img.mean())
+
+
 def compute_visual_variance(frame_paths: List[Path]) -> float:
     if len(frame_paths) < 2:
         return 0.0
 
-    averages = []
-    for path in frame_paths:
-        try:
-            with Image.open(path) as img:
-                grayscale = img.convert("L")
-                pixels = list(grayscale.getdata())
-                if not pixels:
-                    continue
-                averages.append(sum(pixels) / len(pixels))
-        except Exception:
-            continue
+    # JPEG decode releases the GIL; map() keeps frame order for the diffs below.
+    with ThreadPoolExecutor(max_workers=min(8, len(frame_paths))) as executor:
+        averages = [a for a in executor.map(_mean_luminance, frame_paths) if a is not None]
 
     if len(averages) < 2:
         return 0.0
 
-    diffs = [abs(averages[i] - averages[i - 1]) for i in range(1, len(averages))]
-    return sum(diffs) / len(diffs)
+    diffs = np.abs(np.diff(np.array(averages)))
+    return float(diffs.mean())
+
+
+def dhash(path: Path) -> Optional[int]:
+    """64-bit difference hash of a frame; near-identical frames differ in few bits."""
+    img = _load_reduced_gray(path)
+    if img is None:
+        return None
+    if cv2 is not None:
+        small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    else:
+        small = np.asarray(Image.fromarray(img).resize((9, 8), Image.LANCZOS))
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def dedupe_frames(frame_paths: List[Path], min_distance: int = 5) -> List[Path]:
+    """Drop frames whose dHash is within min_distance bits of an earlier kept frame."""
+    unique = []
+    hashes = []
+    for path in frame_paths:
+        frame_hash = dhash(path)
+        if frame_hash is not None:
+            if any(bin(frame_hash ^ seen).count("1") < min_distance for seen in hashes):
+                continue
+            hashes.append(frame_hash)
+        unique.append(path)
+    return unique
 
 
 def aggregate_heuristics(transcript: str, duration: float, frame_paths: List[Path]) -> dict:
-    word_count = len(re.findall(r"\b\w+\b", transcript))
+    words = tokenize_words(transcript)
+    word_count = len(words)
     return {
         "word_count": word_count,
         "duration_seconds": duration,
-        "repetition_ratio": round(word_repetition_ratio(transcript), 4),
+        "repetition_ratio": round(_repetition(words), 4),
         "speaking_speed_wps": round(speaking_speed(word_count, duration), 2),
         "transcript_density_wps": round(transcript_density(word_count, duration), 2),
         "visual_variance": round(compute_visual_variance(frame_paths), 2),
@@ -3,24 +3,37 @@ import streamlit as st
 import json
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 from io import StringIO
 
 from openai import OpenAI
 
-from analysis_agent import run_analysis
+from analysis_agent import FRAME_URL_EXPIRES_IN, frame_image_urls, run_analysis
 from video_utils import (
     download_youtube,
-    extract_audio,
-    sample_frames,
+    extract_audio_and_frames,
     get_video_duration,
 )
 import pandas as pd
 
-from helpers import (transcribe_audio, prepare_workspace, analysis_to_table)
+from helpers import (transcribe_audio, prepare_workspace, analysis_to_table, file_digest)
 # ---------- Helper functions ----------
 
+# Every widget interaction reruns this script in a fresh workspace, so the
+# caches are keyed on file content digests; underscored args are not hashed.
+@st.cache_data(show_spinner=False)
+def cached_transcribe_audio(audio_digest: str, _client: OpenAI, _audio_path: Path) -> Tuple[str, str]:
+    return transcribe_audio(_client, _audio_path)
+
+
+# Expire before presigned frame URLs (FRAME_UPLOAD_MODE=s3) stop working.
+@st.cache_data(show_spinner=False, ttl=FRAME_URL_EXPIRES_IN // 2)
+def cached_frame_image_urls(frame_digests: Tuple[str, ...], _frame_paths: List[Path]) -> List[str]:
+    return frame_image_urls(_frame_paths)
+
+
 # def analysis_to_table(analysis: dict) -> pd.DataFrame:
 #     rows = []
 #     for key, value in analysis.items():
@@ -125,7 +138,8 @@ if run_btn:
         st.stop()
 
     os.environ["OPENAI_API_KEY"] = api_key
-    client = OpenAI(api_key=api_key)
+    # Retries are handled by helpers.with_retry.
+    client = OpenAI(api_key=api_key, max_retries=0)
 
     workspace = prepare_workspace()
 
@@ -162,16 +176,29 @@ if run_btn:
         duration = get_video_duration(video_path)
 
         progress.progress(30)
-        log("Extracting audio")
+        log("Extracting audio and sampling video frames")
         audio_path = workspace / "audio.wav"
-        extract_audio(video_path, audio_path)
+        frames_dir = workspace / "frames"
+        frame_paths = extract_audio_and_frames(
+            video_path, audio_path, frames_dir, max_frames=frames, duration=duration
+        )
+        log(f"Sampled {len(frame_paths)} frames")
 
         progress.progress(45)
-        log("Transcribing audio")
-        transcript, language = transcribe_audio(client, audio_path)
+        log("Transcribing audio and preparing frames")
+        # Prepare frame images while the transcription request is in flight.
+        audio_digest = file_digest(audio_path)
+        frame_digests = tuple(file_digest(path) for path in frame_paths)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            transcribe_future = executor.submit(cached_transcribe_audio, audio_digest, client, audio_path)
+            frames_future = executor.submit(cached_frame_image_urls, frame_digests, frame_paths)
+            transcript, language = transcribe_future.result()
+
+            progress.progress(60)
+            log(f"Transcription complete (language: {language or 'unknown'})")
 
-        progress.progress(60)
-        log(f"Transcription complete (language: {language or 'unknown'})")
+            frame_urls = frames_future.result()
+        log(f"Attaching {len(frame_urls)} of {len(frame_paths)} frames after deduplication")
 
         with st.expander("📝 Transcript preview", expanded=False):
             st.text_area(
@@ -180,12 +207,7 @@ if run_btn:
                 height=200,
             )
 
-        log("Sampling video frames")
-        frames_dir = workspace / "frames"
-        frame_paths = sample_frames(video_path, frames_dir, max_frames=frames)
-
         progress.progress(75)
-        log(f"Sampled {len(frame_paths)} frames")
 
         # --- Analysis ---
         log("Running multimodal analysis")
@@ -195,6 +217,7 @@ if run_btn:
             language_hint=language,
             frame_paths=frame_paths,
             client=client,
+            frame_urls=frame_urls,
         )
 
         progress.progress(100)
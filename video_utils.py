@@ -1,11 +1,18 @@
 """Helpers for downloading and processing videos."""
 from pathlib import Path
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 
 
 def _run(command: List[str]) -> subprocess.CompletedProcess:
+    # ffmpeg/yt-dlp progress output is never read, so don't buffer it in Python.
+    return subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _run_capture(command: List[str]) -> subprocess.CompletedProcess:
     return subprocess.run(command, check=True, capture_output=True, text=True)
 
 
@@ -32,7 +39,7 @@ def get_video_duration(video_path: Path) -> float:
         "default=noprint_wrappers=1:nokey=1",
         str(video_path),
     ]
-    result = _run(command)
+    result = _run_capture(command)
     return float(result.stdout.strip() or 0)
 
 
@@ -55,23 +62,91 @@ def extract_audio(video_path: Path, audio_path: Path) -> None:
     _run(command)
 
 
-def sample_frames(video_path: Path, frames_dir: Path, max_frames: int = 10) -> List[Path]:
-    frames_dir.mkdir(parents=True, exist_ok=True)
-    duration = get_video_duration(video_path)
+def _frame_timestamps(duration: float, max_frames: int) -> List[float]:
     if duration <= 0:
         raise ValueError("Unable to determine video duration for frame sampling")
-    interval = max(duration / max_frames, 1)
-    fps_value = 1 / interval
+    return [duration * (i + 0.5) / max_frames for i in range(max_frames)]
+
+
+def _frame_path(frames_dir: Path, index: int) -> Path:
+    return frames_dir / f"frame_{index:03d}.jpg"
+
+
+def _grab_frame(video_path: Path, timestamp: float, frame_path: Path) -> None:
+    # Input-side -ss seeks via keyframes instead of decoding from the start.
     command = [
         "ffmpeg",
         "-y",
+        "-ss",
+        f"{timestamp:.3f}",
         "-i",
         str(video_path),
-        "-vf",
-        f"fps={fps_value}",
         "-frames:v",
-        str(max_frames),
-        str(frames_dir / "frame_%03d.jpg"),
+        "1",
+        "-q:v",
+        "3",
+        str(frame_path),
     ]
     _run(command)
-    return sorted(frames_dir.glob("frame_*.jpg"))
\ No newline at end of file
+
+
+def sample_frames(
+    video_path: Path,
+    frames_dir: Path,
+    max_frames: int = 10,
+    duration: Optional[float] = None,
+) -> List[Path]:
+    """Sample frames only, without audio; the apps use extract_audio_and_frames."""
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    if duration is None:
+        duration = get_video_duration(video_path)
+    timestamps = _frame_timestamps(duration, max_frames)
+    if not timestamps:
+        return []
+    frame_paths = [_frame_path(frames_dir, i) for i in range(1, len(timestamps) + 1)]
+    # Each worker runs its own ffmpeg process; don't start more than the CPUs can decode.
+    with ThreadPoolExecutor(max_workers=min(len(timestamps), os.cpu_count() or 4)) as executor:
+        list(executor.map(lambda args: _grab_frame(video_path, *args), zip(timestamps, frame_paths)))
+    return [path for path in frame_paths if path.exists()]
+
+
+def extract_audio_and_frames(
+    video_path: Path,
+    audio_path: Path,
+    frames_dir: Path,
+    max_frames: int = 10,
+    duration: Optional[float] = None,
+) -> List[Path]:
+    """Extract the audio track and sample frames with a single ffmpeg invocation.
+
+    The first input feeds the audio output; each frame comes from its own
+    fast-seeked input, so the video stream is never decoded end to end.
+    """
+    audio_path.parent.mkdir(parents=True, exist_ok=True)
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    if duration is None:
+        duration = get_video_duration(video_path)
+    timestamps = _frame_timestamps(duration, max_frames)
+    frame_paths = [_frame_path(frames_dir, i) for i in range(1, len(timestamps) + 1)]
+
+    command = ["ffmpeg", "-y", "-i", str(video_path)]
+    for timestamp in timestamps:
+        command.extend(["-ss", f"{timestamp:.3f}", "-i", str(video_path)])
+    command.extend(
+        [
+            "-map",
+            "0:a:0",
+            "-vn",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            "16000",
+            "-ac",
+            "1",
+            str(audio_path),
+        ]
+    )
+    for input_index, frame_path in enumerate(frame_paths, start=1):
+        command.extend(["-map", f"{input_index}:v:0", "-frames:v", "1", "-q:v", "3", str(frame_path)])
+    _run(command)
+    return [path for path in frame_paths if path.exists()]